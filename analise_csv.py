@@ -1,26 +1,43 @@
 import argparse
+import csv
+import io
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-import matplotlib.dates as mdates
-import xlsxwriter
-from xlsxwriter.utility import xl_rowcol_to_cell
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import subprocess
 import sys
 import os
 import platform
+from concurrent.futures import ThreadPoolExecutor
 import json
-from datetime import date, datetime, timedelta
-from colorama import init, Fore, Style
+import html
 
-# Initialize colorama
-init(autoreset=True)
+# colorama is imported and initialized on first use, see term_colors()
+COLOR_INITIALIZED = False
+
+def term_colors():
+    """Return colorama's (Fore, Style), initializing colorama once."""
+    global COLOR_INITIALIZED
+    from colorama import init, Fore, Style
+    if not COLOR_INITIALIZED:
+        init(autoreset=True)
+        COLOR_INITIALIZED = True
+    return Fore, Style
 
 # === i18n Configuration ===
 DEFAULT_LANG = 'pl'
 CURRENT_LANG = DEFAULT_LANG
 TRANSLATIONS = {}
 
+# === Day periods ===
+# morning < MIDDAY_START_HOUR <= midday < EVENING_START_HOUR <= evening
+MIDDAY_START_HOUR = 10
+EVENING_START_HOUR = 16
+PERIODS = ['morning', 'midday', 'evening']
+
 def load_translations(lang):
     """Load translations from external file analise_csv.<lang>"""
     global TRANSLATIONS
@@ -31,6 +48,7 @@ def load_translations(lang):
         with open(file_path, 'r', encoding='utf-8') as f:
             TRANSLATIONS = json.load(f)
     except FileNotFoundError:
+        Fore, Style = term_colors()
         print(f"{Fore.RED}❌ Translation file not found: {file_path}{Style.RESET_ALL}")
         # Try fallback
         if lang != 'en':
@@ -53,37 +71,127 @@ def t(key, **kwargs):
     except KeyError:
         return msg 
 
-def parse_arguments():
+def parse_arguments(argv=None):
     parser = argparse.ArgumentParser(description="Process and analyze merged CSV files.")
     parser.add_argument('-i', '--input', required=True, nargs='+', help='Input CSV file paths')
     parser.add_argument('-o', '--output', required=True, help='Output CSV file path')
     parser.add_argument('--start-date', help='Minimum date (inclusive) in YYYY-MM-DD format')
     parser.add_argument('--end-date', help='Maximum date (inclusive) in YYYY-MM-DD format')
     parser.add_argument('--lang', default='pl', help='Language code for output (default: pl)')
-    return parser.parse_args()
+    parser.add_argument('--png', action='store_true', help='Also render the PNG line charts of daily averages')
+    parser.add_argument('--cache', help='Parquet file with previously merged data; only input CSVs newer than it are parsed')
+    return parser.parse_args(argv)
+
+def read_csv_table(file, start_ts=None, end_ts=None):
+    """Parse one CSV into an Arrow table with typed datetime + 3 integer columns.
+
+    Rows outside [start_ts, end_ts] are dropped together with incomplete rows.
+    """
+    with open(file, 'r', encoding='utf-8', newline='') as f:
+        header = next(csv.reader(f), [])
+    if len(header) < 4:
+        return None
+
+    # Types are assigned during the (multithreaded) parse, no second coercion pass.
+    # Blood pressure / pulse readings fit int16, which keeps later passes narrow.
+    column_types = {header[0]: pa.timestamp('s')}
+    for col in header[1:4]:
+        column_types[col] = pa.int16()
 
-def read_and_merge_files(file_paths, swap_cols=False):
-    dfs = []
-    for file in file_paths:
+    try:
+        table = pacsv.read_csv(file,
+                               read_options=pacsv.ReadOptions(block_size=8 << 20),
+                               convert_options=pacsv.ConvertOptions(column_types=column_types))
+    except pa.ArrowInvalid:
+        # Some cells are not parseable - coerce them to nulls like before
+        df = pd.read_csv(file)
+        df[header[0]] = pd.to_datetime(df[header[0]], errors='coerce')
+        for col in header[1:4]:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for col, col_type in column_types.items():
+            idx = table.schema.get_field_index(col)
+            cast_options = pc.CastOptions(col_type, allow_float_truncate=True, allow_time_truncate=True)
+            table = table.set_column(idx, col, pc.cast(table.column(idx), options=cast_options))
+
+    valid = pc.is_valid(table.column(0))
+    for idx in range(1, 4):
+        valid = pc.and_(valid, pc.is_valid(table.column(idx)))
+    # Date range pushdown: out-of-range rows never reach pandas or the dedup
+    if start_ts is not None:
+        valid = pc.and_(valid, pc.greater_equal(table.column(0), pa.scalar(start_ts, pa.timestamp('s'))))
+    if end_ts is not None:
+        valid = pc.and_(valid, pc.less_equal(table.column(0), pa.scalar(end_ts, pa.timestamp('s'))))
+    return table.filter(valid)
+
+def measurement_key(df):
+    """Pack datetime (seconds) and the 3 readings of each row into one int64.
+
+    Returns None when the values don't fit the 33/10/10/10 bit layout.
+    """
+    ts = df.iloc[:, 0].to_numpy().astype('datetime64[s]').view(np.int64)
+    vals = df.iloc[:, 1:4].to_numpy(dtype=np.int64)
+    if len(ts) and (ts.min() < 0 or ts.max() >= 1 << 33 or vals.min() < 0 or vals.max() >= 1 << 10):
+        return None
+    return (ts << 30) | (vals[:, 0] << 20) | (vals[:, 1] << 10) | vals[:, 2]
+
+def read_and_merge_files(file_paths, swap_cols=False, cache_path=None, start_date=None, end_date=None):
+    tables = []
+    if cache_path and os.path.exists(cache_path):
+        # Files older than the cache are already merged into it
+        cache_mtime = os.path.getmtime(cache_path)
+        cached = pq.read_table(cache_path)
+        # Parquet has no seconds unit: restore timestamp[s] so the CSV has no '.000' suffix
+        cached = cached.set_column(0, cached.field(0).name, pc.cast(cached.column(0), pa.timestamp('s')))
+        tables.append(cached)
+        file_paths = [f for f in file_paths if not os.path.exists(f) or os.path.getmtime(f) > cache_mtime]
+
+    # The cache must hold every reading, so the date range is only pushed into the parse without it
+    start_ts = pd.Timestamp(start_date) if start_date and not cache_path else None
+    end_ts = pd.Timestamp(end_date) if end_date and not cache_path else None
+
+    def parse(file):
         try:
-            df = pd.read_csv(file)
-            if df.shape[1] < 4:
-                continue
-            datetime_col = df.columns[0]
-            df[datetime_col] = pd.to_datetime(df[datetime_col], errors='coerce')
-            for col in df.columns[1:4]:
-                df[col] = pd.to_numeric(df[col], errors='coerce', downcast='integer')
-            df.dropna(subset=[df.columns[0], df.columns[1], df.columns[2], df.columns[3]], inplace=True)
-            dfs.append(df)
+            return read_csv_table(file, start_ts, end_ts)
         except Exception as e:
             print(t('error_reading', file=file, e=e))
+            return None
 
-    if not dfs:
+    # Files are parsed concurrently; the Arrow reader releases the GIL.
+    # Capped at 8: reads are I/O bound and each parse already uses Arrow's own threads
+    with ThreadPoolExecutor(max_workers=max(1, min(len(file_paths), 8))) as ex:
+        new_tables = [table for table in ex.map(parse, file_paths) if table is not None]
+    parsed = len(new_tables)
+    tables.extend(new_tables)
+
+    if not tables:
         print(t('no_valid_data'))
         sys.exit(1)
 
-    combined_df = pd.concat(dfs, ignore_index=True)
-    combined_df.drop_duplicates(inplace=True)
+    # One Arrow concat (zero-copy) and a single conversion to pandas
+    combined = pa.concat_tables(tables, promote_options='permissive')
+    combined_df = combined.to_pandas(split_blocks=True, self_destruct=True)
+
+    # A row is a duplicate only if every column matches. The timestamp + 3 readings are
+    # packed into one int64 ordered by timestamp first, and integer extra columns
+    # (omblepy's mov/ihb) break ties: one stable lexsort orders the rows and makes
+    # duplicates adjacent. The merged frame therefore comes out ordered by that key
+    # (timestamp first), not in input order; the drop_duplicates() fallback keeps input order
+    key = measurement_key(combined_df)
+    extra = combined_df.iloc[:, 4:]
+    if key is not None and all(pd.api.types.is_integer_dtype(dtype) for dtype in extra.dtypes):
+        extra_vals = extra.to_numpy(dtype=np.int64)
+        order = np.lexsort((*extra_vals.T[::-1], key))
+        rows = np.column_stack([key, extra_vals])[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]).any(axis=1)
+        combined_df = combined_df.iloc[order[first]]
+    else:
+        combined_df = combined_df.drop_duplicates()
+
+    if cache_path and parsed:
+        pq.write_table(pa.Table.from_pandas(combined_df, preserve_index=False), cache_path,
+                       compression='zstd', row_group_size=262144)
 
     if swap_cols and combined_df.shape[1] >= 3:
         cols = combined_df.columns.tolist()
@@ -93,74 +201,82 @@ def read_and_merge_files(file_paths, swap_cols=False):
     return combined_df
 
 def filter_and_sort_data(df, datetime_col, start_date=None, end_date=None):
-    if start_date:
-        df = df[df[datetime_col] >= pd.to_datetime(start_date)]
-    if end_date:
-        df = df[df[datetime_col] <= pd.to_datetime(end_date)]
-    df.sort_values(by=datetime_col, inplace=True)
-    return df
-
-def generate_statistics(df, int_cols, label):
-    # Stats as Rows, Metrics as Columns
-    stats = df[int_cols].describe(percentiles=[0.25, 0.5, 0.75]).loc[['min', '25%', '50%', '75%', 'max']]
-    
-    stats.rename(index={
-        'min': t('stat_min'),
-        '25%': t('stat_q1'),
-        '50%': t('stat_median'),
-        '75%': t('stat_q3'),
-        'max': t('stat_max')
-    }, inplace=True)
-    
-    stats = stats.T 
+    # Sort first, then find the date range with two binary searches (no boolean masks).
+    # After the packed-key dedup in read_and_merge_files() df is already in time order;
+    # the stable sort is run-aware, so it is close to O(n) there and only does real work
+    # after the drop_duplicates() fallback, which leaves rows in input order
+    df = df.sort_values(by=datetime_col, kind='stable')
+    # Each bound is parsed exactly once
+    start_ts = pd.Timestamp(start_date) if start_date else None
+    end_ts = pd.Timestamp(end_date) if end_date else None
+    lo = df[datetime_col].searchsorted(start_ts, side='left') if start_ts is not None else 0
+    hi = df[datetime_col].searchsorted(end_ts, side='right') if end_ts is not None else len(df)
+    return df.iloc[lo:hi]
+
+def quantile_stats(values, int_cols):
+    """min/q1/median/q3/max of each column of a 2D array, as [Metrics x Stats]."""
+    if len(values):
+        q = np.quantile(values, [0, 0.25, 0.5, 0.75, 1.0], axis=0)
+    else:
+        q = np.full((5, values.shape[1]), np.nan)
+    columns = [t('stat_min'), t('stat_q1'), t('stat_median'), t('stat_q3'), t('stat_max')]
+    return pd.DataFrame(q.T, index=int_cols, columns=columns)
+
+def write_csv(df, path):
+    """Write df as CSV through the multithreaded Arrow writer."""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Arrow always quotes the header, write it like pandas did
+    header = io.StringIO()
+    csv.writer(header, lineterminator='\n').writerow(table.column_names)
+    with open(path, 'wb') as f:
+        f.write(header.getvalue().encode('utf-8'))
+        pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=False, batch_size=1 << 16,
+                                                                   quoting_style='needed'))
+
+def generate_statistics(values, int_cols, label):
+    # values is the raw [rows x int_cols] array, no describe() over the frame
+    stats = quantile_stats(values, int_cols)
     
+    Fore, Style = term_colors()
     print(f"\n{Fore.GREEN + Style.BRIGHT}{t('stats_for', label=label)}{Style.RESET_ALL}")
     print(Fore.CYAN + stats.to_string() + Style.RESET_ALL)
 
     return stats, stats.to_string()
 
-def generate_plot(df, stats_all, stats_morning, stats_midday, stats_evening, datetime_col, int_cols, output_image):
-    # Prepare data for plotting (Daily Averages)
-    df['date_only'] = df[datetime_col].dt.date
-    # Aggregating mean and std for error bars
-    daily_avg = df.groupby('date_only')[int_cols].agg(['mean', 'std'])
-    
-    # Filter daily avg for periods if possible? 
-    # Actually, for the daily charts (Morn/Mid/Eve), we should ideally plot the *period* averages, not just total daily.
-    # But for now, to keep it simple and robust, let's plot:
-    # 1. Overall Chart (All data points or daily avg of all) -> chart_all
-    # 2. Daily Chart for Morning -> Filter DF for morn -> groupby date -> plot
-    # 3. Daily Chart for Midday -> Filter DF for mid -> groupby date -> plot
-    # 4. Daily Chart for Evening -> Filter DF for eve -> groupby date -> plot
-    
-    def get_period_daily_avg(hour_min, hour_max):
-        # hour_max is exclusive, unless it's 24
-        if hour_max == 24:
-             subset = df[df[datetime_col].dt.hour >= hour_min].copy()
-        else:
-             subset = df[(df[datetime_col].dt.hour >= hour_min) & (df[datetime_col].dt.hour < hour_max)].copy()
-        
-        if subset.empty:
-            # Return empty structure matching the agg result
-            return pd.DataFrame(columns=pd.MultiIndex.from_product([int_cols, ['mean', 'std']]))
-            
-        subset['date_only'] = subset[datetime_col].dt.date
-        return subset.groupby('date_only')[int_cols].agg(['mean', 'std'])
+def day_period(hour):
+    """Categorical morning/midday/evening label for an array of hours."""
+    codes = np.select([hour < MIDDAY_START_HOUR, hour < EVENING_START_HOUR], [0, 1], default=2)
+    return pd.Categorical.from_codes(codes, categories=PERIODS)
+
+def generate_plot(daily_avg, daily_stats, int_cols, output_image):
+    # Imported here so runs without --png don't pay the matplotlib import
+    import matplotlib
+    # The figure is only saved to a file: skip GUI backend resolution
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    # daily_avg and daily_stats (mean and std per day, for error bars) are computed once in main()
+
+    # Per-period daily averages are the (Day, Period) groups of daily_stats, no extra pass over df
+    periods = daily_stats.index.get_level_values('Period')
+
+    def get_period_daily_avg(p_key):
+        return daily_stats[periods == p_key].droplevel('Period')
 
     # Data Source for Charts
     data_all = daily_avg # Overall Daily Average
-    data_morn = get_period_daily_avg(0, 10)
-    data_mid = get_period_daily_avg(10, 16)
-    data_eve = get_period_daily_avg(16, 24)
+    data_morn = get_period_daily_avg('morning')
+    data_mid = get_period_daily_avg('midday')
+    data_eve = get_period_daily_avg('evening')
 
     system = platform.system()
     plt.rcParams['font.family'] = ['Segoe UI Emoji', 'DejaVu Sans', 'sans-serif'] if system == "Windows" else ['DejaVu Sans']
 
-    # Layout: 4 Rows x 2 Cols
-    # Col 0: Summary Table (Width 1)
-    # Col 1: Chart (Width 3)
-    fig = plt.figure(figsize=(24, 24))
-    gs = gridspec.GridSpec(4, 2, width_ratios=[1, 3], height_ratios=[1, 1, 1, 1])
+    # Layout: 4 Rows x 1 Col, one chart each
+    # Margins are fixed for this figure size, so no layout solver runs at save time
+    fig, axes = plt.subplots(4, 1, figsize=(18, 24))
+    fig.subplots_adjust(left=0.04, right=0.99, top=0.98, bottom=0.03, hspace=0.25)
 
     colors = ['#1f77b4', '#ff7f0e', '#2ca02c'] # Sys, Dia, Pulse
 
@@ -169,20 +285,26 @@ def generate_plot(df, stats_all, stats_morning, stats_midday, stats_evening, dat
             ax.text(0.5, 0.5, t('warning_chart_data'), ha='center', va='center')
             return
 
-        for idx, col in enumerate(int_cols):
-            linestyle = '-'
-            marker = 'o'
-            if idx == 2: linestyle = ':' # Pulse
-            
-            # Extract mean and std. If std is NaN (one point), fill with 0
-            means = data[col]['mean']
-            stds = data[col]['std'].fillna(0)
-            
-            # ax.errorbar replaces ax.plot
-            # capsize=3 adds the horizontal lines at the end of error bars
-            ax.errorbar(data.index, means, yerr=stds, label=col, 
-                        linestyle=linestyle, marker=marker, color=colors[idx],
-                        capsize=3, alpha=0.9)
+        xs = mdates.date2num(data.index)
+        # [days x series] arrays; if std is NaN (one point), fill with 0
+        means = data.xs('mean', axis=1, level=1)[int_cols].to_numpy()
+        stds = data.xs('std', axis=1, level=1)[int_cols].fillna(0).to_numpy()
+        n_series = means.shape[1]
+
+        # All series in one ax.plot call; colors and linestyles (Pulse dotted) come from the cycle
+        ax.set_prop_cycle(color=colors[:n_series], linestyle=['-', '-', ':'][:n_series])
+        ax.plot(xs, means, label=list(int_cols), marker='o', alpha=0.9)
+
+        # Error bars of all series as one LineCollection and their caps as one
+        # scatter, instead of 3 artists per series from ax.errorbar
+        bar_x = np.tile(xs, n_series)
+        bar_colors = np.repeat(colors[:n_series], len(xs))
+        # Series-major, matching bar_x / bar_colors
+        low, high = (means - stds).T.ravel(), (means + stds).T.ravel()
+        ax.vlines(bar_x, low, high, colors=bar_colors, alpha=0.9)
+        # capsize=3 -> cap marker 6pt wide, as ax.errorbar draws it
+        ax.scatter(np.concatenate([bar_x, bar_x]), np.concatenate([low, high]), marker='_',
+                   s=6 ** 2, linewidths=1, c=np.tile(bar_colors, 2), alpha=0.9)
 
         locator = mdates.AutoDateLocator(minticks=5, maxticks=10)
         ax.xaxis.set_major_locator(locator)
@@ -194,119 +316,89 @@ def generate_plot(df, stats_all, stats_morning, stats_midday, stats_evening, dat
         if ax.get_subplotspec().is_first_row():
              ax.legend(loc='upper right')
 
-    def draw_table(ax, stats_df, title, header_color):
-        ax.axis('off')
-        ax.text(0.5, 1.0, title, fontsize=11, ha='center', va='bottom', transform=ax.transAxes, weight='bold')
-        
-        table_data = stats_df.map(lambda x: round(x, 1) if isinstance(x, (int, float)) else x)
-        table = ax.table(cellText=table_data.values, 
-                         rowLabels=table_data.index, 
-                         colLabels=table_data.columns, 
-                         cellLoc='center', 
-                         loc='center')
-        
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 1.3)
-        
-        for (row, col), cell in table.get_celld().items():
-            if row == 0:
-                cell.set_text_props(weight='bold', color='white')
-                cell.set_facecolor(header_color)
-            elif col == -1: 
-                cell.set_text_props(weight='bold')
-                cell.set_facecolor('#f0f0f0')
-
-    # Row 0: All
-    ax_t0 = plt.subplot(gs[0, 0]); draw_table(ax_t0, stats_all, t('summary_header_all'), "#444444")
-    ax_c0 = plt.subplot(gs[0, 1]); draw_chart(ax_c0, data_all, t('chart_title'))
-
-    # Row 1: Morning
-    ax_t1 = plt.subplot(gs[1, 0]); draw_table(ax_t1, stats_morning, t('summary_header_morning'), "#2ca02c")
-    ax_c1 = plt.subplot(gs[1, 1]); draw_chart(ax_c1, data_morn, t('chart_title_morning'))
-
-    # Row 2: Midday
-    ax_t2 = plt.subplot(gs[2, 0]); draw_table(ax_t2, stats_midday, t('summary_header_midday'), "#ff7f0e")
-    ax_c2 = plt.subplot(gs[2, 1]); draw_chart(ax_c2, data_mid, t('chart_title_midday'))
-
-    # Row 3: Evening
-    ax_t3 = plt.subplot(gs[3, 0]); draw_table(ax_t3, stats_evening, t('summary_header_afternoon'), "#1f77b4")
-    ax_c3 = plt.subplot(gs[3, 1]); draw_chart(ax_c3, data_eve, t('chart_title_evening'))
-
-    plt.tight_layout()
+    # One chart per row: all readings, then each period. The summary tables go to
+    # the TXT/HTML sidecars (export_summaries), not into the figure
+    charts = [
+        (data_all, t('chart_title')),
+        (data_morn, t('chart_title_morning')),
+        (data_mid, t('chart_title_midday')),
+        (data_eve, t('chart_title_evening')),
+    ]
+    for ax, (data, title) in zip(axes, charts):
+        draw_chart(ax, data, title)
+
     plt.savefig(output_image)
     print(t('plot_saved', output=output_image))
 
-def export_to_excel_with_chart(output_path, df, stats_all, stats_morning, stats_midday, stats_evening):
+def export_summaries(output_path, sections):
+    """Write the summary tables to <output>.txt and an <output>.html sidecar.
+
+    sections is a list of (title, stats_df, stats_text) in display order.
+    """
+    base = os.path.splitext(output_path)[0]
+    txt_path = base + ".txt"
+    with open(txt_path, 'w', encoding='utf-8') as f:
+        f.write(t('txt_header') + "\n")
+        for title, _, text in sections:
+            f.write(f"\n{title}\n{text}\n")
+
+    body = "\n".join(f"<h2>{html.escape(title)}</h2>\n{stats_df.to_html(float_format='{:.2f}'.format)}"
+                     for title, stats_df, _ in sections)
+    with open(base + ".html", 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>{html.escape(t('txt_header').strip('= '))}</title></head>\n"
+                f"<body>\n{body}\n</body>\n</html>\n")
+    print(t('summaries_exported', path=txt_path))
+
+def export_to_excel_with_chart(output_path, df, daily_stats, stats_all, stats_morning, stats_midday, stats_evening):
+    import xlsxwriter
+    from xlsxwriter.utility import xl_rowcol_to_cell
+
     excel_path = os.path.splitext(output_path)[0] + ".xlsx"
 
-    # Enforce numeric types
-    for col in [t('col_sys'), t('col_dia'), t('col_hr')]:
-        if col in df.columns:
-             df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Pre-calculate Day and Period for grouping
-    df['Day'] = df[df.columns[0]].dt.date
-    df['Hour'] = df[df.columns[0]].dt.hour
-    
-    def get_period(h):
-        if h < 10: return 'morning'
-        if 10 <= h < 16: return 'midday'
-        return 'evening'
-    
-    df['Period'] = df['Hour'].apply(get_period)
-
-    # Helper to track column widths
-    col_widths = {}
-    def update_width(col_idx, value):
-        current_w = col_widths.get(col_idx, 0)
-        # Estimate width: Length of string representation + padding
-        if isinstance(value, (datetime, date)):
-            val_len = 12
-        elif isinstance(value, float):
-            val_len = len(f"{value:.2f}")
-        else:
-            val_len = len(str(value))
-        
-        # Cap max width to 50
-        new_w = min(max(current_w, val_len + 2), 50)
-        col_widths[col_idx] = new_w
+    # df is only read here: numeric types are already guaranteed by read_and_merge_files()
 
-    # 1. Calculate Daily Stats (Long Format)
-    # Group by [Day, Period] -> Mean, Std
-    daily_stats = df.groupby(['Day', 'Period'])[[t('col_sys'), t('col_dia'), t('col_hr')]].agg(['mean', 'std'])
-    
-    min_date = df['Day'].min()
-    max_date = df['Day'].max()
-    all_dates = pd.date_range(start=min_date, end=max_date, freq='D').date
+    # Translated metric names, looked up once for headers, frame columns and chart series
+    metrics = [t('col_sys'), t('col_dia'), t('col_hr')]
+
+    # daily_stats: [Day, Period] -> Mean, Std (Long Format), computed in main()
+    days = daily_stats.index.get_level_values('Day')
+    all_dates = pd.date_range(start=days.min(), end=days.max(), freq='D')
     
-    with pd.ExcelWriter(excel_path, engine='xlsxwriter', datetime_format='YYYY-MM-DD HH:mm') as writer:
-        workbook = writer.book
+    # constant_memory streams each row to disk once the next row is started, so peak
+    # memory no longer grows with the Data sheet. Every sheet must be written row by row.
+    with xlsxwriter.Workbook(excel_path, {'constant_memory': True}) as workbook:
+        date_fmt = workbook.add_format({'num_format': 'YYYY-MM-DD HH:mm'})
+        day_fmt = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+        header_fmt = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        title_fmt = workbook.add_format({'bold': True, 'font_size': 12})
+        bold = workbook.add_format({'bold': True})
+        # Full precision is stored, Excel displays 2 decimals
+        num_fmt = workbook.add_format({'num_format': '0.00'})
         
         # === Sheet 1: Raw Data ===
-        # Export original columns only (drop temp columns)
-        raw_cols = [c for c in df.columns if c not in ['Day', 'Hour', 'Period']]
-        df[raw_cols].to_excel(writer, sheet_name=t('sheet_data'), index=False)
-        data_sheet = writer.sheets[t('sheet_data')]
-        date_fmt = workbook.add_format({'num_format': 'YYYY-MM-DD HH:mm'})
+        # Written directly: DataFrame.to_excel emits cells column by column
+        data_sheet = workbook.add_worksheet(t('sheet_data'))
         data_sheet.set_column('A:A', 20, date_fmt)
+        data_sheet.write_row(0, 0, df.columns.tolist(), header_fmt)
+        other = df.iloc[:, 1:]
+        other_rows = other.astype(object).where(other.notna(), None).to_numpy().tolist()
+        for r_idx, (ts, row) in enumerate(zip(df.iloc[:, 0].tolist(), other_rows), start=1):
+            data_sheet.write_datetime(r_idx, 0, ts, date_fmt)
+            data_sheet.write_row(r_idx, 1, row)
 
         # === Sheet 2: Summary (Static Tables) ===
         summary_ws = workbook.add_worksheet(t('sheet_summary'))
-        writer.sheets[t('sheet_summary')] = summary_ws
         
         # Write Static Summary Tables (Calculated in Python)
         def write_static_table(ws, start_row, start_col, title, stats_df):
-            ws.write(start_row, start_col, title, workbook.add_format({'bold': True, 'font_size': 12}))
+            ws.write(start_row, start_col, title, title_fmt)
             # stats_df is [Metrics x Stats] (Transposed in generate_statistics)
             # Write Headers (min, q1...)
-            for i, h in enumerate(stats_df.columns):
-                ws.write(start_row+1, start_col+1+i, h, workbook.add_format({'bold': True}))
-            # Write Rows
-            for r_idx, (metric, row) in enumerate(stats_df.iterrows()):
-                ws.write(start_row+2+r_idx, start_col, metric, workbook.add_format({'bold': True}))
-                for c_idx, val in enumerate(row):
-                    ws.write_number(start_row+2+r_idx, start_col+1+c_idx, val)
+            ws.write_row(start_row+1, start_col+1, stats_df.columns.tolist(), bold)
+            # Write Rows (one write_row per metric, no iterrows)
+            for r_idx, (metric, row) in enumerate(zip(stats_df.index, stats_df.to_numpy().tolist())):
+                ws.write(start_row+2+r_idx, start_col, metric, bold)
+                ws.write_row(start_row+2+r_idx, start_col+1, row, num_fmt)
 
         # Vertical Stack on Left
         write_static_table(summary_ws, 0, 0, t('summary_header_all'), stats_all)
@@ -316,129 +408,91 @@ def export_to_excel_with_chart(output_path, df, stats_all, stats_morning, stats_
 
         # === Sheet 3: Chart Data (Static Values) ===
         chart_ws = workbook.add_worksheet(t('sheet_chart_data'))
-        writer.sheets[t('sheet_chart_data')] = chart_ws
+        # Both sections share rows, so they are collected first and written row by row below
+        long_rows = []
+        wide_rows = []
         
         # --- SECTION 1: LONG FORMAT ---
         cols = [
             t('col_label'), t('col_date_helper'), 
-            t('col_sys'), t('col_dia'), t('col_hr'), 
-            f"{t('col_sys')}_std", f"{t('col_dia')}_std", f"{t('col_hr')}_std"
+            *metrics,
+            *(f"{m}_std" for m in metrics)
         ]
         chart_ws.write_row('A1', cols)
         
-        # Header Widths
-        for i, c in enumerate(cols): update_width(i, c)
-        
         period_map = {
             'morning': t('label_morning'),
             'midday': t('label_midday'),
             'evening': t('label_evening')
         }
         
-        # Sort order: Date, then Period (Morn, Mid, Eve)
-        row_long = 2
-        for d in all_dates:
-            d_str = d.strftime('%Y-%m-%d')
-            for p_key in ['morning', 'midday', 'evening']:
-                if (d, p_key) in daily_stats.index:
-                    # Get values
-                    stats = daily_stats.loc[(d, p_key)]
-                    
-                    means = [
-                        round(stats[(t('col_sys'), 'mean')], 0),
-                        round(stats[(t('col_dia'), 'mean')], 0),
-                        round(stats[(t('col_hr'), 'mean')], 0)
-                    ]
-                    stds = [
-                        round(stats[(t('col_sys'), 'std')], 0) if not pd.isna(stats[(t('col_sys'), 'std')]) else 0,
-                        round(stats[(t('col_dia'), 'std')], 0) if not pd.isna(stats[(t('col_dia'), 'std')]) else 0,
-                        round(stats[(t('col_hr'), 'std')], 0) if not pd.isna(stats[(t('col_hr'), 'std')]) else 0
-                    ]
-                    
-                    label = f"{d_str} {period_map[p_key]}"
-                    chart_ws.write(row_long-1, 0, label)
-                    chart_ws.write_datetime(row_long-1, 1, d, date_fmt)
-                    
-                    update_width(0, label)
-                    update_width(1, d)
-
-                    # Write Means
-                    chart_ws.write_number(row_long-1, 2, means[0])
-                    chart_ws.write_number(row_long-1, 3, means[1])
-                    chart_ws.write_number(row_long-1, 4, means[2])
-                    update_width(2, means[0]); update_width(3, means[1]); update_width(4, means[2])
-
-                    # Write Stds
-                    chart_ws.write_number(row_long-1, 5, stds[0])
-                    chart_ws.write_number(row_long-1, 6, stds[1])
-                    chart_ws.write_number(row_long-1, 7, stds[2])
-                    update_width(5, stds[0]); update_width(6, stds[1]); update_width(7, stds[2])
-                    
-                    row_long += 1
-        
-        last_row_long = row_long - 1
+        # Rectangular [Day x (Period, stat, metric)] frame, one row per calendar day
+        wide = daily_stats.round(0).unstack('Period')
+        wide.columns = wide.columns.reorder_levels([2, 1, 0])
+        wide = wide.reindex(index=all_dates, columns=pd.MultiIndex.from_product([PERIODS, ['mean', 'std'], metrics]))
+        # A single reading has no std: plot it without an error bar
+        std_cols = wide.columns.get_level_values(1) == 'std'
+        wide.loc[:, std_cols] = wide.loc[:, std_cols].fillna(0)
 
         # --- SECTION 2: WIDE FORMAT ---
         start_col_wide = 10 
         chart_ws.write(0, start_col_wide, "Date (Wide)")
-        update_width(start_col_wide, "Date (Wide)")
         
         wide_headers = []
-        for p_key in ['morning', 'midday', 'evening']:
+        for p_key in PERIODS:
             p_label = period_map[p_key]
-            for metric in [t('col_sys'), t('col_dia'), t('col_hr')]:
+            for metric in metrics:
                 wide_headers.append(f"{p_label}_{metric}")
-            for metric in [t('col_sys'), t('col_dia'), t('col_hr')]:
+            for metric in metrics:
                 wide_headers.append(f"{p_label}_{metric}_err")
         chart_ws.write_row(0, start_col_wide+1, wide_headers)
-        
-        for i, h in enumerate(wide_headers):
-            update_width(start_col_wide+1+i, h)
-        
-        row_wide = 2
-        for d in all_dates:
-            chart_ws.write_datetime(row_wide-1, start_col_wide, d, date_fmt)
-            update_width(start_col_wide, d)
-            
-            col_offset = 0
-            for p_key in ['morning', 'midday', 'evening']:
-                if (d, p_key) in daily_stats.index:
-                    stats = daily_stats.loc[(d, p_key)]
-                    
-                    # Values
-                    v1 = round(stats[(t('col_sys'), 'mean')], 0)
-                    v2 = round(stats[(t('col_dia'), 'mean')], 0)
-                    v3 = round(stats[(t('col_hr'), 'mean')], 0)
-
-                    chart_ws.write_number(row_wide-1, start_col_wide+1+col_offset, v1)
-                    chart_ws.write_number(row_wide-1, start_col_wide+2+col_offset, v2)
-                    chart_ws.write_number(row_wide-1, start_col_wide+3+col_offset, v3)
-                    
-                    update_width(start_col_wide+1+col_offset, v1)
-                    update_width(start_col_wide+2+col_offset, v2)
-                    update_width(start_col_wide+3+col_offset, v3)
-
-                    # Errors (Default 0 if NaN)
-                    conf_std = lambda col: round(stats[(col, 'std')], 0) if not pd.isna(stats[(col, 'std')]) else 0
-                    
-                    e1 = conf_std(t('col_sys'))
-                    e2 = conf_std(t('col_dia'))
-                    e3 = conf_std(t('col_hr'))
-                    
-                    chart_ws.write_number(row_wide-1, start_col_wide+4+col_offset, e1)
-                    chart_ws.write_number(row_wide-1, start_col_wide+5+col_offset, e2)
-                    chart_ws.write_number(row_wide-1, start_col_wide+6+col_offset, e3)
-                    
-                    update_width(start_col_wide+4+col_offset, e1)
-                    update_width(start_col_wide+5+col_offset, e2)
-                    update_width(start_col_wide+6+col_offset, e3)
-                
-                col_offset += 6 # 3 vals + 3 errs per period
-            
-            row_wide += 1
-        last_row_wide = row_wide - 1
 
-        # Apply Auto-Widths
+        # Dense days x periods x (3 means + 3 stds) array, indexed by position only
+        vals = wide.to_numpy(dtype=float).reshape(len(all_dates), len(PERIODS), 6)
+        # A day/period with readings always has a mean
+        present = ~np.isnan(vals[:, :, 0])
+
+        # Sort order: Date, then Period (Morn, Mid, Eve)
+        for d, day_vals, day_present in zip(all_dates, vals.tolist(), present.tolist()):
+            d_str = d.strftime('%Y-%m-%d')
+            # One cell per period value/error, None where the period has no data
+            wide_values = [None] * len(wide_headers)
+            for p_idx, (p_key, block, has_data) in enumerate(zip(PERIODS, day_vals, day_present)):
+                if not has_data:
+                    continue
+                col_offset = p_idx * 6 # 3 vals + 3 errs per period
+                wide_values[col_offset:col_offset+6] = block
+
+                label = f"{d_str} {period_map[p_key]}"
+                long_rows.append((label, d, block))
+            wide_rows.append((d, wide_values))
+
+        last_row_long = len(long_rows) + 1
+        last_row_wide = len(wide_rows) + 1
+
+        # Write both sections in row order (required by constant_memory)
+        for r_idx in range(max(len(long_rows), len(wide_rows))):
+            if r_idx < len(long_rows):
+                label, d, values = long_rows[r_idx]
+                chart_ws.write(r_idx+1, 0, label)
+                chart_ws.write_datetime(r_idx+1, 1, d, day_fmt)
+                chart_ws.write_row(r_idx+1, 2, values)
+            if r_idx < len(wide_rows):
+                d, values = wide_rows[r_idx]
+                chart_ws.write_datetime(r_idx+1, start_col_wide, d, day_fmt)
+                chart_ws.write_row(r_idx+1, start_col_wide+1, values)
+
+        # Auto-Widths from the finished data: longest rendered value + padding, capped at 50
+        def fit(header, val_len):
+            return min(max(len(header), val_len) + 2, 50)
+        num_len = lambda v: len(f"{v:.2f}")
+        # Values are non-negative, so the column maximum is also the longest string
+        wide_max = np.fmax.reduce(vals.reshape(len(all_dates), -1), axis=0, initial=0)
+        long_max = wide_max.reshape(len(PERIODS), 6).max(axis=0)
+        label_len = len('YYYY-MM-DD ') + max(len(period_map[p]) for p in daily_stats.index.get_level_values('Period').unique())
+        col_widths = {0: fit(cols[0], label_len), 1: fit(cols[1], 12), start_col_wide: fit("Date (Wide)", 12)}
+        col_widths.update({2+i: fit(c, num_len(m)) for i, (c, m) in enumerate(zip(cols[2:], long_max))})
+        col_widths.update({start_col_wide+1+i: fit(h, num_len(m)) for i, (h, m) in enumerate(zip(wide_headers, wide_max))})
         for col, width in col_widths.items():
             chart_ws.set_column(col, col, width)
 
@@ -446,11 +500,10 @@ def export_to_excel_with_chart(output_path, df, stats_all, stats_morning, stats_
         def create_chart(title, cat_sheet, cat_row_start, cat_row_end, cat_col, val_sheet, val_row_start, val_row_end, val_col_start, val_err_col_start, is_date_axis=False):
             chart = workbook.add_chart({'type': 'line'})
             colors = ['#1f77b4', '#ff7f0e', '#2ca02c']
-            names = [t('col_sys'), t('col_dia'), t('col_hr')]
             
             for i in range(3):
                 chart.add_series({
-                    'name': names[i],
+                    'name': metrics[i],
                     'categories': [cat_sheet, cat_row_start, cat_col, cat_row_end, cat_col],
                     'values':     [val_sheet, val_row_start, val_col_start+i, val_row_end, val_col_start+i],
                     'line':       {'color': colors[i], 'width': 2.25},
@@ -502,36 +555,62 @@ def export_to_excel_with_chart(output_path, df, stats_all, stats_morning, stats_
 
     print(t('excel_exported', path=excel_path))
 
-def main():
+def main(argv=None):
+    """Run the analysis; argv defaults to sys.argv[1:] so callers can run it in-process."""
     global CURRENT_LANG
-    args = parse_arguments()
+    args = parse_arguments(argv)
     CURRENT_LANG = args.lang
     load_translations(CURRENT_LANG)
 
-    df = read_and_merge_files(args.input, True)
+    df = read_and_merge_files(args.input, True, args.cache, args.start_date, args.end_date)
     
     if len(df.columns) >= 4:
-        df.rename(columns={ df.columns[1]: t('col_sys'), df.columns[2]: t('col_dia'), df.columns[3]: t('col_hr') }, inplace=True)
+        df = df.rename(columns={ df.columns[1]: t('col_sys'), df.columns[2]: t('col_dia'), df.columns[3]: t('col_hr') })
         int_cols = [t('col_sys'), t('col_dia'), t('col_hr')]
     else:
-        int_cols = df.columns[1:4]
+        # Plain list of names, like the branch above: cheaper as a column key than an Index
+        int_cols = df.columns[1:4].tolist()
         
     datetime_col = df.columns[0]
     df = filter_and_sort_data(df, datetime_col, args.start_date, args.end_date)
-    df.to_csv(os.path.splitext(args.output)[0] + ".csv", index=False)
+    write_csv(df, os.path.splitext(args.output)[0] + ".csv")
     print(t('sorted_saved', output=args.output))
 
-    # Calculate Stats
-    stats_all, s_all = generate_statistics(df, int_cols, t('header_all_rows'))
-    stats_morning, s_morn = generate_statistics(df[df[datetime_col].dt.hour < 10], int_cols, t('period_morning'))
-    stats_midday, s_mid = generate_statistics(df[(df[datetime_col].dt.hour >= 10) & (df[datetime_col].dt.hour < 16)], int_cols, t('period_midday'))
-    stats_evening, s_eve = generate_statistics(df[df[datetime_col].dt.hour >= 16], int_cols, t('period_afternoon'))
+    # Day keys (datetime64[D], no Python date objects) and hours taken from one
+    # datetime64 array, shared by the stats and the daily aggregates
+    timestamps = df[datetime_col].to_numpy()
+    day_keys = timestamps.astype('datetime64[D]')
+    hour = (timestamps - day_keys).astype('timedelta64[h]').astype(np.int64)
 
-    export_to_excel_with_chart(args.output, df, stats_all, stats_morning, stats_midday, stats_evening)
+    # Calculate Stats
+    # float32 is exact for int16 readings and their quarter-step quantiles, at half the bytes of float64
+    values = df[int_cols].to_numpy(dtype=np.float32)
+    # Period of every row, computed once
+    period = day_period(hour)
+    stats_all, s_all = generate_statistics(values, int_cols, t('header_all_rows'))
+    stats_morning, s_morn = generate_statistics(values[period == 'morning'], int_cols, t('period_morning'))
+    stats_midday, s_mid = generate_statistics(values[period == 'midday'], int_cols, t('period_midday'))
+    stats_evening, s_eve = generate_statistics(values[period == 'evening'], int_cols, t('period_afternoon'))
+
+    # Daily aggregates shared by the Excel export and the plot
+    day = pd.Series(day_keys, index=df.index, name='Day')
+    period = pd.Series(period, index=df.index, name='Period')
+    # df is sorted by time, so groups already come out in (Day, Period) order: skip the re-sort
+    daily_avg = df.groupby(day, sort=False)[int_cols].agg(['mean', 'std'])
+    daily_stats = df.groupby([day, period], sort=False, observed=True)[int_cols].agg(['mean', 'std'])
+
+    export_summaries(args.output, [
+        (t('summary_header_all'), stats_all, s_all),
+        (t('summary_header_morning'), stats_morning, s_morn),
+        (t('summary_header_midday'), stats_midday, s_mid),
+        (t('summary_header_afternoon'), stats_evening, s_eve),
+    ])
+    export_to_excel_with_chart(args.output, df, daily_stats, stats_all, stats_morning, stats_midday, stats_evening)
     
-    # Generate PNG Plot
-    output_png = os.path.splitext(args.output)[0] + ".png"
-    generate_plot(df, stats_all, stats_morning, stats_midday, stats_evening, datetime_col, int_cols, output_png)
+    # Generate PNG Plot (the Excel file already has the charts)
+    if args.png:
+        output_png = os.path.splitext(args.output)[0] + ".png"
+        generate_plot(daily_avg, daily_stats, int_cols, output_png)
 
 if __name__ == "__main__":
     main()
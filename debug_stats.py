@@ -1,31 +1,35 @@
+import numpy as np
 import pandas as pd
+import pyarrow.csv as pacsv
 import sys
 
-# Helpers for time slots
-def get_time_slot(h):
-    if h < 10: return 'morning'
-    if h < 16: return 'midday'
-    return 'evening'
+# Time slots: before 10 morning, before 16 midday, then evening
+SLOT_BOUNDS = [10, 16]
+SLOT_LABELS = ['morning', 'midday', 'evening']
 
 try:
-    df = pd.read_csv('Evolv-1-2026-01-11-od_2026-01-06.csv')
+    # Multithreaded Arrow parse, converted to pandas once
+    df = pacsv.read_csv('Evolv-1-2026-01-11-od_2026-01-06.csv').to_pandas()
     df['Date'] = pd.to_datetime(df.iloc[:,0])
-    df['Day'] = df['Date'].dt.date
+    # datetime64[D] day keys and categorical periods group without Python objects
+    df['Day'] = df['Date'].to_numpy().astype('datetime64[D]')
     df['Hour'] = df['Date'].dt.hour
-    df['Period'] = df['Hour'].apply(get_time_slot)
+    # Slot index of every row in one vectorized lookup (a boundary hour starts the next slot)
+    df['Period'] = pd.Categorical.from_codes(np.searchsorted(SLOT_BOUNDS, df['Hour'].to_numpy(), side='right'),
+                                             categories=SLOT_LABELS, ordered=True)
+
+    # One grouping shared by the counts and the std
+    groups = df.groupby(['Day', 'Period'], sort=False, observed=True)
 
     print("Counts per Day/Period:")
-    counts = df.groupby(['Day', 'Period']).size()
+    counts = groups.size()
     print(counts)
     
-    # Check Stdev manually for a sample
-    print("\nSample StdDev Calculation (Python):")
-    for name, group in df.groupby(['Day', 'Period']):
-        print(f"\n{name}: count={len(group)}")
-        if len(group) > 1:
-            print(group.iloc[:, 1:4].std())
-        else:
-            print("Single value, std=NaN")
+    # Std of every group in one reduction (NaN for single-value groups)
+    print("\nStdDev per Day/Period:")
+    stds = groups[df.columns[1:4].tolist()].std()
+    stds.insert(0, 'count', counts)
+    print(stds.to_string())
 
 except Exception as e:
     print(e)
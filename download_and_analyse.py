@@ -127,25 +127,28 @@ def main():
             # For 'none' platform, we need to check if any of the input files exist
             outputfile1 = f"M7-{m7_user}-{today_str}.csv"
             outputfile2 = f"Evolv-1-{today_str}.csv"
-            
-            if not os.path.exists(outputfile1) and not os.path.exists(outputfile2):
-                print("\nError: No input files found for 'none' platform.")
-                print(f"Please ensure at least one of these files exists in the current directory:")
-                print(f"- {outputfile1}")
-                print(f"- {outputfile2}")
-                sys.exit(1)
+
+        # One directory scan instead of an os.path.exists() call per candidate file
+        existing = {entry.name for entry in os.scandir('.') if entry.is_file()}
+
+        if label == "none" and outputfile1 not in existing and outputfile2 not in existing:
+            print("\nError: No input files found for 'none' platform.")
+            print(f"Please ensure at least one of these files exists in the current directory:")
+            print(f"- {outputfile1}")
+            print(f"- {outputfile2}")
+            sys.exit(1)
 
         # Output file for merged results
         merged_output = f"analiza-{today_str}.csv"
 
-        # Prepare arguments for the analysis script
-        analysis_args = ["python", "analise_csv.py", "-o", merged_output]
+        # Prepare arguments for the analysis
+        analysis_args = ["-o", merged_output, "--png"]
         
         # Add input files if they exist
         input_files = []
-        if outputfile1 and os.path.exists(outputfile1):
+        if outputfile1 in existing:
             input_files.append(outputfile1)
-        if outputfile2 and os.path.exists(outputfile2):
+        if outputfile2 in existing:
             input_files.append(outputfile2)
             
         if not input_files:
@@ -155,9 +158,11 @@ def main():
         # Add all input files at once
         analysis_args.extend(["-i"] + input_files)
 
-        # Call the main processing script
+        # Run the analysis in this interpreter: no second Python start-up. Imported only
+        # here, so --help, config errors and the download don't pay for pandas/pyarrow
         print("\nRunning main analysis...")
-        subprocess.run(analysis_args, check=True)
+        import analise_csv
+        analise_csv.main(analysis_args)
 
         print(f"\nAnalysis complete. Results saved as '{merged_output}' and 'analiza-{today_str}.png'.")
 
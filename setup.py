@@ -19,11 +19,13 @@ setup(
     packages=find_packages(),
     install_requires=[
         "pandas>=2.0.0",
+        "numpy>=1.22.0",
         "matplotlib>=3.7.0",
         "xlsxwriter>=3.1.0",
         "colorama>=0.4.6",
         "bleak>=0.21.1",
         "terminaltables>=3.1.10",
+        "pyarrow>=14.0.0",
     ],
     python_requires=">=3.8",
     author="Your Name",